@@ -0,0 +1,84 @@
+"""
+Weather Analytics Benchmark
+Times the vectorized analytics in weather_analytics on synthetic daily data
+for many stations over many years (1,000 stations x 30 years by default),
+including loading the data back from Parquet. Correctness against pandas is
+tested separately in weather_analytics_test.py.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from weather_analytics import WeatherDataset, load_weather_data
+
+
+def generate_station_data(n_stations, n_years, seed=0):
+    """
+    Generate synthetic long-format daily data for n_stations over n_years.
+
+    Returns:
+        pd.DataFrame: One row per station and day
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1995-01-01", periods=int(n_years * 365.25), freq="D")
+    n_days = len(dates)
+
+    seasonal = 8 * np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 200) / 365.25)
+    base = rng.normal(14, 4, size=(n_stations, 1))
+    temperature = base + seasonal + rng.normal(0, 2.5, size=(n_stations, n_days))
+    rainy = rng.random((n_stations, n_days)) < 0.25
+    precipitation = np.where(rainy, rng.gamma(2, 4, size=(n_stations, n_days)), 0.0)
+
+    return pd.DataFrame({
+        "station": np.repeat(np.arange(n_stations), n_days),
+        "date": np.tile(dates.to_numpy(), n_stations),
+        "temperature": temperature.ravel(),
+        "precipitation": precipitation.ravel(),
+    })
+
+
+def timed(label, func, *args, **kwargs):
+    """Run func once, print its wall time and return its result."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<32} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark vectorized weather analytics")
+    parser.add_argument("--stations", type=int, default=1000,
+                        help="Number of stations (default: 1000)")
+    parser.add_argument("--years", type=int, default=30,
+                        help="Number of years of daily data (default: 30)")
+    args = parser.parse_args()
+
+    df = timed("generate data", generate_station_data, args.stations, args.years)
+    print(f"{len(df):,} rows ({args.stations} stations x {args.years} years)\n")
+
+    timed("from_frame", WeatherDataset.from_frame, df)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "weather.parquet")
+        timed("write parquet", df.to_parquet, path, index=False)
+        print(f"{'parquet size':<32} {os.path.getsize(path) / 1e6:8.1f}MB")
+        dataset = timed("load_weather_data (parquet)", load_weather_data, path)
+    timed("rolling_mean(30)", dataset.rolling_mean, 30)
+    timed("rolling_mean(90)", dataset.rolling_mean, 90)
+    timed("monthly mean", dataset.monthly, "temperature", "mean")
+    timed("monthly precipitation sum", dataset.monthly, "precipitation", "sum")
+    timed("climatology", dataset.climatology)
+    timed("anomalies", dataset.anomalies)
+    timed("rain_streaks", dataset.rain_streaks)
+    timed("summary", dataset.summary)
+    timed("station_summary (cold)", dataset.station_summary, 0)
+    timed("station_summary (cached)", dataset.station_summary, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,24 @@ Cagliari Weather Graph - January 2025
 This script creates a line graph showing simulated daily temperature data for Cagliari in January 2025.
 """
 
+import base64
+import hashlib
+import io
 import matplotlib.pyplot as plt
 import numpy as np
 import os
 import webbrowser
 from datetime import datetime, timedelta
 
+from weather_analytics import WeatherDataset
+
+REPORT_PREFIX = "cagliari_weather_january_2025_"
+# Part of the render cache key; bump whenever the figure or HTML code changes.
+# Module constants that shape the output are passed to the key separately.
+RENDER_VERSION = 2
+# Days in the trailing rolling mean drawn over the daily temperatures
+ROLLING_WINDOW = 5
+
 def generate_cagliari_january_data():
     """
     Generate simulated weather data for Cagliari in January 2025.
@@ -46,20 +58,43 @@ def generate_cagliari_january_data():
     
     return date_labels, temperatures, precipitation
 
-def create_cagliari_weather_graph():
+def _render_cache_key(dates, temperatures, precipitation, **params):
     """
-    Create and save a graph of Cagliari's simulated January 2025 weather.
+    Hash the plotted data and rendering parameters into a cache key.
     
     Returns:
-        str: Path to the saved HTML file
+        str: Hex digest identifying the rendered report
     """
-    dates, temperatures, precipitation = generate_cagliari_january_data()
+    digest = hashlib.sha256()
+    digest.update(f"render-v{RENDER_VERSION}\0".encode("ascii"))
+    digest.update("\x1f".join(dates).encode("utf-8"))
+    for values in (temperatures, precipitation):
+        array = np.ascontiguousarray(values, dtype=np.float64)
+        digest.update(str(array.shape).encode("ascii"))
+        digest.update(array.tobytes())
+    digest.update(repr(sorted(params.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+def _plot_weather(dates, dataset, station):
+    """
+    Draw the temperature and precipitation subplots for one station of a WeatherDataset.
+    
+    Returns:
+        matplotlib.figure.Figure: The rendered figure
+    """
+    i = dataset.station_index(station)
+    temperatures = dataset.temperature[i]
+    precipitation = dataset.precipitation[i]
+    rolling_mean = dataset.rolling_mean(ROLLING_WINDOW, min_periods=1)[i]
     
     # Create figure with two subplots (temperature and precipitation)
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10), gridspec_kw={'height_ratios': [3, 1]})
     
     # Temperature plot
-    ax1.plot(dates, temperatures, 'o-', color='#FF5733', linewidth=2, markersize=6)
+    ax1.plot(dates, temperatures, 'o-', color='#FF5733', linewidth=2, markersize=6, label='Daily')
+    ax1.plot(dates, rolling_mean, '--', color='#8E44AD', linewidth=2,
+             label=f'{ROLLING_WINDOW}-day average')
+    ax1.legend(loc='upper right')
     ax1.set_title('Simulated Daily Temperatures in Cagliari - January 2025', fontsize=16)
     ax1.set_ylabel('Temperature (°C)', fontsize=12)
     ax1.grid(True, linestyle='--', alpha=0.7)
@@ -92,17 +127,96 @@ def create_cagliari_weather_graph():
                         fontsize=8)
     
     plt.tight_layout()
+    return fig
+
+def _evict_old_reports(output_dir, max_reports, keep_stem):
+    """
+    Delete all but the most recently used reports in output_dir.
+    A report is an HTML file plus its image, if it has one. The report named
+    keep_stem is never deleted and counts towards max_reports.
+    """
+    reports = {}
+    for name in os.listdir(output_dir):
+        stem, ext = os.path.splitext(name)
+        if name.startswith(REPORT_PREFIX) and ext in (".html", ".png", ".svg"):
+            path = os.path.join(output_dir, name)
+            reports.setdefault(stem, []).append(path)
     
-    # Save the graph
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"cagliari_weather_january_2025_{timestamp}.html"
-    img_filename = f"cagliari_weather_january_2025_{timestamp}.png"
+    def last_used(stem):
+        return max(os.path.getmtime(path) for path in reports[stem])
     
-    # Save as PNG for embedding
-    plt.savefig(img_filename)
+    others = sorted((stem for stem in reports if stem != keep_stem), key=last_used, reverse=True)
+    for stem in others[max_reports - 1:]:
+        for path in reports[stem]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def create_cagliari_weather_graph(output_dir=".", inline_image=False, image_format="png", max_reports=5):
+    """
+    Create and save a graph of Cagliari's simulated January 2025 weather.
+    
+    Reports are cached under a hash of the data and rendering parameters, so
+    repeated calls with identical input return the existing file without
+    re-rendering the figure.
+    
+    Args:
+        output_dir (str): Directory the report is written to
+        inline_image (bool): Embed the image in a single self-contained HTML file
+        image_format (str): "png" or "svg"
+        max_reports (int): Number of most recently used reports kept in output_dir,
+            or None to disable eviction
+    
+    Returns:
+        str: Path to the saved HTML file
+    """
+    if image_format not in ("png", "svg"):
+        raise ValueError(f"Unsupported image format: {image_format}")
+    if max_reports is not None and max_reports < 1:
+        raise ValueError("max_reports must be at least 1")
+    
+    dates, temperatures, precipitation = generate_cagliari_january_data()
+    
+    cache_key = _render_cache_key(dates, temperatures, precipitation,
+                                  inline_image=inline_image, image_format=image_format,
+                                  rolling_window=ROLLING_WINDOW)
+    stem = REPORT_PREFIX + cache_key[:16]
+    filename = os.path.join(output_dir, f"{stem}.html")
+    img_filename = os.path.join(output_dir, f"{stem}.{image_format}")
+    
+    # Cache hit: mark the report as recently used and return it
+    if os.path.exists(filename) and (inline_image or os.path.exists(img_filename)):
+        os.utime(filename)
+        if not inline_image:
+            os.utime(img_filename)
+        return filename
+    
+    os.makedirs(output_dir, exist_ok=True)
+    dataset = WeatherDataset(["Cagliari"], "2025-01-01", temperatures[np.newaxis, :],
+                             precipitation[np.newaxis, :])
+    summary = dataset.station_summary("Cagliari")
+    anomalies = dataset.anomalies()[0]
+    fig = _plot_weather(dates, dataset, "Cagliari")
+    
+    if inline_image:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=image_format)
+        if image_format == "svg":
+            svg = buffer.getvalue().decode("utf-8")
+            image_html = svg[svg.index("<svg"):]
+        else:
+            encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+            image_html = f'<img src="data:image/png;base64,{encoded}" alt="Cagliari Weather Graph">'
+    else:
+        # Save the image next to the HTML file for embedding
+        fig.savefig(img_filename, format=image_format)
+        image_html = f'<img src="{os.path.basename(img_filename)}" alt="Cagliari Weather Graph">'
+    plt.close(fig)
     
     # Create HTML file with the image and additional information
-    with open(filename, 'w') as f:
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
         f.write(f"""
         <!DOCTYPE html>
         <html>
@@ -112,7 +226,7 @@ def create_cagliari_weather_graph():
                 body {{ font-family: Arial, sans-serif; margin: 20px; line-height: 1.6; }}
                 .container {{ max-width: 1000px; margin: 0 auto; }}
                 h1 {{ color: #2C3E50; text-align: center; }}
-                img {{ max-width: 100%; height: auto; display: block; margin: 20px auto; border: 1px solid #ddd; }}
+                img, svg {{ max-width: 100%; height: auto; display: block; margin: 20px auto; border: 1px solid #ddd; }}
                 .info {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-top: 20px; }}
                 .note {{ font-style: italic; color: #666; }}
             </style>
@@ -121,7 +235,7 @@ def create_cagliari_weather_graph():
             <div class="container">
                 <h1>Cagliari Weather Forecast - January 2025</h1>
                 
-                <img src="{img_filename}" alt="Cagliari Weather Graph">
+                {image_html}
                 
                 <div class="info">
                     <h2>Weather Summary</h2>
@@ -129,11 +243,14 @@ def create_cagliari_weather_graph():
                     
                     <h3>Key Observations:</h3>
                     <ul>
-                        <li>Average temperature: {np.mean(temperatures):.1f}°C</li>
-                        <li>Highest temperature: {np.max(temperatures):.1f}°C</li>
-                        <li>Lowest temperature: {np.min(temperatures):.1f}°C</li>
-                        <li>Total precipitation: {np.sum(precipitation):.1f}mm</li>
-                        <li>Number of rainy days: {np.sum(precipitation > 0)}</li>
+                        <li>Average temperature: {summary['mean_temperature']:.1f}°C</li>
+                        <li>Highest temperature: {summary['max_temperature']:.1f}°C</li>
+                        <li>Lowest temperature: {summary['min_temperature']:.1f}°C</li>
+                        <li>Total precipitation: {summary['total_precipitation']:.1f}mm</li>
+                        <li>Number of rainy days: {summary['rainy_days']}</li>
+                        <li>Longest rainy spell: {summary['longest_rain_streak']} days</li>
+                        <li>Warmest day relative to the monthly average: {dates[np.argmax(anomalies)]} ({np.max(anomalies):+.1f}°C)</li>
+                        <li>Coldest day relative to the monthly average: {dates[np.argmin(anomalies)]} ({np.min(anomalies):+.1f}°C)</li>
                     </ul>
                     
                     <p class="note">Note: This is simulated data based on historical weather patterns for Cagliari in January.
@@ -143,6 +260,10 @@ def create_cagliari_weather_graph():
         </body>
         </html>
         """)
+    os.replace(tmp_filename, filename)
+    
+    if max_reports is not None:
+        _evict_old_reports(output_dir, max_reports, stem)
     
     return filename
 
@@ -0,0 +1,97 @@
+"""
+Tests for the Cagliari weather report render cache, single-file output and
+eviction, writing into temporary output directories.
+"""
+
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+
+import pytest
+
+import cagliari_weather_graph as graph
+
+
+def report_stems(output_dir):
+    """Return the report names in output_dir, without extensions."""
+    return {os.path.splitext(name)[0] for name in os.listdir(output_dir)
+            if name.startswith(graph.REPORT_PREFIX)}
+
+
+def make_report(output_dir, stem, mtime):
+    """Create a placeholder HTML+PNG report last used at mtime."""
+    for ext in (".html", ".png"):
+        path = os.path.join(output_dir, stem + ext)
+        with open(path, "w") as f:
+            f.write("placeholder")
+        os.utime(path, (mtime, mtime))
+
+
+def test_cache_hit_returns_same_report_without_rendering(monkeypatch):
+    output_dir = tempfile.mkdtemp()
+    first = graph.create_cagliari_weather_graph(output_dir)
+
+    def fail_render(*args, **kwargs):
+        raise AssertionError("cache hit should not render the figure")
+
+    monkeypatch.setattr(graph, "_plot_weather", fail_render)
+    assert graph.create_cagliari_weather_graph(output_dir) == first
+    assert os.path.exists(first)
+    assert os.path.exists(first[:-len(".html")] + ".png")
+
+
+def test_render_options_change_the_key():
+    dates, temperatures, precipitation = graph.generate_cagliari_january_data()
+    keys = {
+        graph._render_cache_key(dates, temperatures, precipitation,
+                                inline_image=inline_image, image_format=image_format)
+        for inline_image in (False, True)
+        for image_format in ("png", "svg")
+    }
+    assert len(keys) == 4
+
+    changed = temperatures.copy()
+    changed[0] += 0.1
+    assert (graph._render_cache_key(dates, changed, precipitation)
+            != graph._render_cache_key(dates, temperatures, precipitation))
+    assert (graph._render_cache_key(dates, temperatures, precipitation, rolling_window=5)
+            != graph._render_cache_key(dates, temperatures, precipitation, rolling_window=7))
+
+
+def test_inline_svg_is_a_single_file():
+    output_dir = tempfile.mkdtemp()
+    path = graph.create_cagliari_weather_graph(output_dir, inline_image=True, image_format="svg")
+    with open(path) as f:
+        html = f.read()
+    assert "<svg" in html
+    assert "<?xml" not in html
+    assert os.listdir(output_dir) == [os.path.basename(path)]
+
+
+def test_eviction_keeps_newest_and_current_report():
+    output_dir = tempfile.mkdtemp()
+    # Other reports look more recently used than the one about to be written
+    future = time.time() + 3600
+    for i in range(4):
+        make_report(output_dir, f"{graph.REPORT_PREFIX}other{i}", future + i)
+
+    path = graph.create_cagliari_weather_graph(output_dir, max_reports=2)
+    current = os.path.splitext(os.path.basename(path))[0]
+    assert report_stems(output_dir) == {current, f"{graph.REPORT_PREFIX}other3"}
+
+
+def test_legacy_timestamped_reports_are_evicted():
+    output_dir = tempfile.mkdtemp()
+    legacy = graph.REPORT_PREFIX + "20250324175003"
+    make_report(output_dir, legacy, time.time() - 3600)
+
+    path = graph.create_cagliari_weather_graph(output_dir, max_reports=1)
+    assert report_stems(output_dir) == {os.path.splitext(os.path.basename(path))[0]}
+
+
+def test_max_reports_below_one_raises():
+    with pytest.raises(ValueError):
+        graph.create_cagliari_weather_graph(tempfile.mkdtemp(), max_reports=0)
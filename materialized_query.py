@@ -0,0 +1,282 @@
+"""
+Materialized Query Results
+Stores the result of a time-windowed query locally as partitioned Parquet and
+refreshes it incrementally, so repeated dashboard runs only fetch new or
+changed partitions instead of rescanning the full history.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import warnings
+from datetime import date, datetime
+from numbers import Number
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from bigquery_runner import run_query
+
+MANIFEST_FILENAME = "_manifest.json"
+# INFORMATION_SCHEMA.PARTITIONS rows that do not correspond to a partition value
+SPECIAL_PARTITION_IDS = {"__NULL__", "__UNPARTITIONED__", "__STREAMING_UNPARTITIONED__"}
+
+
+def _clean_query(query: str) -> str:
+    """Strip trailing whitespace and semicolons so the query can be wrapped as a subquery."""
+    return query.strip().rstrip(";").rstrip()
+
+
+def _query_hash(query: str, partition_column: str) -> str:
+    """Hash the query text and partition column to detect definition changes."""
+    digest = hashlib.sha256()
+    digest.update(" ".join(query.split()).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(partition_column.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _partition_key(value) -> str:
+    """Convert a partition value into the string used for its directory name."""
+    if isinstance(value, (pd.Timestamp, datetime)):
+        if value == pd.Timestamp(value).normalize():
+            return pd.Timestamp(value).strftime("%Y-%m-%d")
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _sql_literal(value) -> str:
+    """Render a partition value as a SQL literal."""
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return str(value)
+    return "'" + _partition_key(value).replace("'", "\\'") + "'"
+
+
+def _json_value(value):
+    """Convert a partition value into something JSON can store and SQL can compare against."""
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return value.item() if hasattr(value, "item") else value
+    return _partition_key(value)
+
+
+def _load_manifest(store_dir: str) -> Optional[dict]:
+    """Load the manifest for a store, or None if the store does not exist yet."""
+    path = os.path.join(store_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(store_dir: str, manifest: dict) -> None:
+    """Write the manifest atomically so an interrupted refresh keeps the old one."""
+    path = os.path.join(store_dir, MANIFEST_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _partition_dir(store_dir: str, partition_column: str, key: str) -> str:
+    """Return the hive-style directory holding a single partition."""
+    return os.path.join(store_dir, f"{partition_column}={key}")
+
+
+def _write_partitions(store_dir: str, partition_column: str, df: pd.DataFrame,
+                      keys: Iterable[str]) -> None:
+    """
+    Replace the stored partitions listed in keys with the rows from df.
+    Partitions listed in keys but absent from df are removed.
+    """
+    row_keys = df[partition_column].map(_partition_key) if len(df) else pd.Series(dtype=str)
+    for key in keys:
+        part_dir = _partition_dir(store_dir, partition_column, key)
+        tmp_dir = part_dir + ".tmp"
+        rows = df[row_keys == key]
+        if rows.empty:
+            shutil.rmtree(part_dir, ignore_errors=True)
+            continue
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        rows.to_parquet(os.path.join(tmp_dir, "part-0.parquet"), index=False)
+        shutil.rmtree(part_dir, ignore_errors=True)
+        os.replace(tmp_dir, part_dir)
+
+
+def _read_partitions(store_dir: str, partition_column: str, keys: Iterable[str]) -> pd.DataFrame:
+    """Read the stored partitions and concatenate them in partition order."""
+    frames = []
+    for key in sorted(keys):
+        path = os.path.join(_partition_dir(store_dir, partition_column, key), "part-0.parquet")
+        if os.path.exists(path):
+            frames.append(pd.read_parquet(path))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _fetch_partition_versions(client, partition_versions_query: str) -> Dict[str, str]:
+    """
+    Run the partition versions query and return a mapping of partition value to version.
+    The query must return two columns: the partition value and a version marker
+    such as INFORMATION_SCHEMA.PARTITIONS.last_modified_time. Special partition ids
+    like __NULL__ are skipped.
+    """
+    versions = run_query(client, partition_versions_query)
+    partition_values = versions.iloc[:, 0]
+    version_values = versions.iloc[:, 1]
+    return {
+        _partition_key(p): str(v)
+        for p, v in zip(partition_values, version_values)
+        if not pd.isna(p) and _partition_key(p) not in SPECIAL_PARTITION_IDS
+    }
+
+
+def _normalize_version_keys(source_versions: Dict[str, str], stored: dict) -> Dict[str, str]:
+    """
+    Match version keys to the stored partition keys.
+    INFORMATION_SCHEMA.PARTITIONS reports daily partitions as YYYYMMDD strings, while
+    date partitions are stored as YYYY-MM-DD, so those ids are converted when the
+    stored partitions are dates.
+    """
+    if not any(isinstance(value, str) for value in stored.values()):
+        return source_versions
+    normalized = {}
+    for key, version in source_versions.items():
+        if re.fullmatch(r"\d{8}", key):
+            key = f"{key[:4]}-{key[4:6]}-{key[6:]}"
+        normalized[key] = version
+    return normalized
+
+
+def _check_partition_values(delta: pd.DataFrame, partition_column: str) -> None:
+    """Reject query results with NULL partition values, which cannot be stored or compared."""
+    if partition_column not in delta.columns:
+        raise ValueError(f"Query result has no column named {partition_column}")
+    if delta[partition_column].isna().any():
+        raise ValueError(
+            f"Query returned rows with NULL {partition_column}; "
+            f"filter them out with WHERE {partition_column} IS NOT NULL"
+        )
+
+
+def materialize_query(client, query: str, partition_column: str, store_dir: str,
+                      partition_versions_query: Optional[str] = None,
+                      full_refresh: bool = False) -> pd.DataFrame:
+    """
+    Return the result of a query, refreshing a local partitioned Parquet copy incrementally.
+
+    On the first run the whole query result is stored, one directory per value of
+    partition_column. Later runs only query the watermark partition (the latest one
+    stored, which may still be receiving rows) and anything newer, plus any stored
+    partitions whose source version (reported by partition_versions_query) changed
+    or that are no longer listed by it since the last refresh. The new rows replace the matching stored partitions and
+    the combined result is returned. Full rebuilds are written to a fresh directory
+    and only replace the previous data once they have succeeded. While the store
+    holds no rows there is no watermark, so every call reruns the full query.
+
+    Args:
+        client: BigQuery client (or any object with a compatible query() method)
+        query: SQL query producing the result; it is wrapped as a subquery
+        partition_column: Date or partition column the result is keyed by
+        store_dir: Directory holding the materialized Parquet partitions
+        partition_versions_query: Optional SQL returning (partition, version) rows,
+            e.g. partition_id and last_modified_time from INFORMATION_SCHEMA.PARTITIONS;
+            YYYYMMDD partition ids are matched against date partitions
+        full_refresh: Discard the stored result and rerun the full query
+
+    Returns:
+        pd.DataFrame: The combined materialized result, sorted by partition
+
+    Raises:
+        ValueError: If the query returns rows with a NULL partition value
+    """
+    query = _clean_query(query)
+    query_hash = _query_hash(query, partition_column)
+    manifest = _load_manifest(store_dir)
+    rebuild = (full_refresh or manifest is None or manifest.get("query_hash") != query_hash
+               or manifest.get("watermark") is None)
+
+    raw_versions = {}
+    if partition_versions_query:
+        raw_versions = _fetch_partition_versions(client, partition_versions_query)
+
+    if rebuild:
+        # Build into a fresh directory; the old data stays in place until the new
+        # manifest is saved, so a failed query never leaves a partial store behind.
+        previous_data_dir = manifest.get("data_dir") if manifest else None
+        data_dir = f"data-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        stored = {}
+        delta_query = query
+    else:
+        previous_data_dir = None
+        data_dir = manifest["data_dir"]
+        stored = manifest["partitions"]
+        watermark = manifest["watermark"]
+        stored_versions = manifest["versions"]
+        source_versions = _normalize_version_keys(raw_versions, stored)
+        if source_versions and stored and not source_versions.keys() & stored.keys():
+            warnings.warn(
+                "None of the partitions returned by partition_versions_query match a "
+                f"stored {partition_column} value; changed partitions cannot be detected"
+            )
+        # A partition that had a version but is no longer listed was dropped or
+        # expired upstream, so it is re-queried (and removed) too
+        changed_keys = sorted(
+            key for key in stored
+            if (key in source_versions and stored_versions.get(key) != source_versions[key])
+            or (partition_versions_query and key in stored_versions and key not in source_versions)
+        )
+
+        # The watermark partition itself is re-fetched, since rows can still land
+        # in it (e.g. today's partition) after the previous refresh
+        refresh_keys = set(changed_keys) | {_partition_key(watermark)}
+        conditions = [f"{partition_column} >= {_sql_literal(watermark)}"]
+        if changed_keys:
+            literals = ", ".join(_sql_literal(stored[key]) for key in changed_keys)
+            conditions.append(f"{partition_column} IN ({literals})")
+        # The query goes on its own lines so a trailing -- comment cannot swallow the ")"
+        delta_query = f"SELECT * FROM (\n{query}\n) WHERE {' OR '.join(conditions)}"
+
+    delta = run_query(client, delta_query)
+    _check_partition_values(delta, partition_column)
+
+    partitions_dir = os.path.join(store_dir, data_dir)
+    os.makedirs(partitions_dir, exist_ok=True)
+    refreshed_keys = set() if rebuild else refresh_keys
+    for value in delta[partition_column].drop_duplicates():
+        key = _partition_key(value)
+        refreshed_keys.add(key)
+        stored[key] = _json_value(value)
+
+    _write_partitions(partitions_dir, partition_column, delta, refreshed_keys)
+    stored = {
+        key: value for key, value in stored.items()
+        if os.path.isdir(_partition_dir(partitions_dir, partition_column, key))
+    }
+    watermark = max(stored.values()) if stored else None
+    source_versions = _normalize_version_keys(raw_versions, stored)
+
+    _save_manifest(store_dir, {
+        "query_hash": query_hash,
+        "partition_column": partition_column,
+        "data_dir": data_dir,
+        "watermark": watermark,
+        "partitions": stored,
+        "versions": {k: v for k, v in source_versions.items() if k in stored},
+        "refreshed_at": datetime.now().isoformat(),
+    })
+    if previous_data_dir:
+        shutil.rmtree(os.path.join(store_dir, previous_data_dir), ignore_errors=True)
+
+    if not stored:
+        # Nothing stored: return the (empty) query result so its columns are kept
+        return delta.reset_index(drop=True)
+    result = _read_partitions(partitions_dir, partition_column, stored)
+    if len(result):
+        result = result.sort_values(partition_column, kind="stable").reset_index(drop=True)
+    return result
@@ -0,0 +1,212 @@
+"""
+Tests for materialized_query using a fake BigQuery client, so no credentials
+or network access are needed.
+"""
+
+import re
+import tempfile
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from materialized_query import materialize_query
+
+QUERY = "SELECT day, value FROM `project.dataset.table`"
+VERSIONS_QUERY = "SELECT partition_id, last_modified_time FROM INFORMATION_SCHEMA.PARTITIONS"
+
+
+class FakeJob:
+    """Stands in for a BigQuery QueryJob and its RowIterator."""
+
+    def __init__(self, df):
+        self.df = df
+
+    def result(self):
+        return self
+
+    def to_dataframe(self):
+        return self.df.copy()
+
+
+class FakeClient:
+    """
+    Minimal BigQuery client serving an in-memory table.
+    It understands the WHERE clauses materialize_query generates and records every query.
+    """
+
+    def __init__(self, table, versions=None):
+        self.table = table
+        self.versions = versions or {}
+        self.queries = []
+        self.fail = False
+
+    def query(self, sql):
+        self.queries.append(sql)
+        if self.fail:
+            raise RuntimeError("query failed")
+        if sql == VERSIONS_QUERY:
+            return FakeJob(pd.DataFrame({
+                "partition_id": list(self.versions),
+                "last_modified_time": list(self.versions.values()),
+            }))
+
+        df = self.table
+        where = re.fullmatch(r"SELECT \* FROM \(\n.*\n\) WHERE (.*)", sql, re.DOTALL)
+        if where:
+            mask = pd.Series(False, index=df.index)
+            lower = re.search(r"day >= '([\d-]+)'", where.group(1))
+            if lower:
+                mask |= df["day"] >= date.fromisoformat(lower.group(1))
+            listed = re.search(r"day IN \(([^)]*)\)", where.group(1))
+            if listed:
+                days = [date.fromisoformat(d.strip(" '")) for d in listed.group(1).split(",")]
+                mask |= df["day"].isin(days)
+            df = df[mask]
+        return FakeJob(df)
+
+
+def make_table(days, values_per_day=2):
+    """Build a table with values_per_day rows for each day."""
+    return pd.DataFrame({
+        "day": [d for d in days for _ in range(values_per_day)],
+        "value": range(len(days) * values_per_day),
+    })
+
+
+def partition_id(day):
+    """Return the INFORMATION_SCHEMA.PARTITIONS id of a daily partition."""
+    return day.strftime("%Y%m%d")
+
+
+def test_first_load_and_delta_append():
+    store_dir = tempfile.mkdtemp()
+    days = [date(2025, 1, d) for d in range(1, 6)]
+    client = FakeClient(make_table(days))
+
+    result = materialize_query(client, QUERY, "day", store_dir)
+    assert len(result) == 10
+    assert client.queries[-1] == QUERY
+
+    # New rows arrive for the watermark day and for a new day
+    late_rows = pd.DataFrame({"day": [date(2025, 1, 5), date(2025, 1, 6)], "value": [100, 101]})
+    client.table = pd.concat([client.table, late_rows], ignore_index=True)
+    result = materialize_query(client, QUERY, "day", store_dir)
+    assert "day >= '2025-01-05'" in client.queries[-1]
+    assert len(result) == 12
+    assert sorted(result["value"])[-2:] == [100, 101]
+    assert list(result["day"]) == sorted(result["day"])
+
+
+def test_changed_and_disappearing_partitions():
+    store_dir = tempfile.mkdtemp()
+    days = [date(2025, 1, d) for d in range(1, 6)]
+    client = FakeClient(make_table(days), {partition_id(d): "v1" for d in days})
+    materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+
+    # Jan 2 is rewritten upstream and Jan 3 is deleted
+    table = client.table
+    table.loc[table["day"] == date(2025, 1, 2), "value"] = -1
+    client.table = table[table["day"] != date(2025, 1, 3)]
+    client.versions[partition_id(date(2025, 1, 2))] = "v2"
+    client.versions[partition_id(date(2025, 1, 3))] = "v2"
+
+    result = materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+    assert "day IN ('2025-01-02', '2025-01-03')" in client.queries[-1]
+    assert list(result.loc[result["day"] == date(2025, 1, 2), "value"]) == [-1, -1]
+    assert date(2025, 1, 3) not in set(result["day"])
+    assert len(result) == 8
+
+    # Nothing changed: only the watermark partition is queried
+    materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+    assert client.queries[-1].endswith("WHERE day >= '2025-01-05'")
+
+
+def test_unlisted_partition_is_removed():
+    store_dir = tempfile.mkdtemp()
+    days = [date(2025, 1, d) for d in range(1, 6)]
+    client = FakeClient(make_table(days), {partition_id(d): "v1" for d in days})
+    materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+
+    # Jan 2 expires upstream: its rows and its partition_id row both disappear
+    client.table = client.table[client.table["day"] != date(2025, 1, 2)]
+    del client.versions[partition_id(date(2025, 1, 2))]
+
+    result = materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+    assert "day IN ('2025-01-02')" in client.queries[-1]
+    assert date(2025, 1, 2) not in set(result["day"])
+    assert len(result) == 8
+
+    materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+    assert " IN " not in client.queries[-1]
+
+
+def test_query_with_semicolon_and_trailing_comment():
+    store_dir = tempfile.mkdtemp()
+    client = FakeClient(make_table([date(2025, 1, 1), date(2025, 1, 2)]))
+    materialize_query(client, QUERY + "  -- daily values\n;\n", "day", store_dir)
+    materialize_query(client, QUERY + "  -- daily values", "day", store_dir)
+
+    delta_query = client.queries[-1]
+    assert delta_query.startswith("SELECT * FROM (\n" + QUERY + "  -- daily values\n) WHERE")
+    assert ";" not in delta_query
+
+
+def test_empty_first_load_keeps_columns():
+    store_dir = tempfile.mkdtemp()
+    client = FakeClient(make_table([]))
+    result = materialize_query(client, QUERY, "day", store_dir)
+    assert result.empty
+    assert list(result.columns) == ["day", "value"]
+
+    # With nothing stored there is no watermark, so the full query runs again
+    client.table = make_table([date(2025, 1, 1)])
+    result = materialize_query(client, QUERY, "day", store_dir)
+    assert client.queries[-1] == QUERY
+    assert len(result) == 2
+
+
+def test_unmatched_versions_warn():
+    store_dir = tempfile.mkdtemp()
+    days = [date(2025, 1, d) for d in range(1, 3)]
+    client = FakeClient(make_table(days), {"not-a-partition": "v1"})
+    materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+    with pytest.warns(UserWarning, match="cannot be detected"):
+        materialize_query(client, QUERY, "day", store_dir, VERSIONS_QUERY)
+
+
+def test_query_change_rebuilds():
+    store_dir = tempfile.mkdtemp()
+    days = [date(2025, 1, d) for d in range(1, 4)]
+    client = FakeClient(make_table(days))
+    materialize_query(client, QUERY, "day", store_dir)
+
+    new_query = QUERY + " WHERE value >= 0"
+    result = materialize_query(client, new_query, "day", store_dir)
+    assert client.queries[-1] == new_query
+    assert len(result) == 6
+
+
+def test_failed_full_refresh_keeps_data():
+    store_dir = tempfile.mkdtemp()
+    days = [date(2025, 1, d) for d in range(1, 6)]
+    client = FakeClient(make_table(days))
+    materialize_query(client, QUERY, "day", store_dir)
+
+    client.fail = True
+    with pytest.raises(RuntimeError):
+        materialize_query(client, QUERY, "day", store_dir, full_refresh=True)
+
+    client.fail = False
+    result = materialize_query(client, QUERY, "day", store_dir)
+    assert len(result) == 10
+
+
+def test_null_partition_rejected():
+    store_dir = tempfile.mkdtemp()
+    table = make_table([date(2025, 1, 1)])
+    table.loc[0, "day"] = None
+    client = FakeClient(table)
+    with pytest.raises(ValueError, match="NULL day"):
+        materialize_query(client, QUERY, "day", store_dir)
+
@@ -0,0 +1,309 @@
+"""
+Weather Analytics
+Vectorized time-series analytics over multi-station daily weather data.
+Observations are held as dense (station x day) NumPy arrays so rolling means,
+monthly resampling, climatologies, anomalies and rain streaks are computed
+for every station at once, without per-day Python loops.
+"""
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+VARIABLES = ("temperature", "precipitation")
+
+
+def _nan_sum_count(values, axis=-1):
+    """Return the NaN-ignoring cumulative sum and count of values along axis."""
+    valid = ~np.isnan(values)
+    return np.cumsum(np.where(valid, values, 0.0), axis=axis), np.cumsum(valid, axis=axis)
+
+
+def _freeze(value):
+    """Mark the NumPy arrays in a cached value read-only so callers cannot corrupt the cache."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    return value
+
+
+def _safe_divide(sums, counts):
+    """Divide sums by counts, returning NaN where the count is zero."""
+    return np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+
+
+class WeatherDataset:
+    """
+    Daily weather observations for many stations on a shared calendar.
+
+    Each variable is a float array of shape (n_stations, n_days) with NaN for
+    missing days. Aggregates are cached on first use, so repeated requests for
+    the same station or parameters only cost a dictionary lookup. Cached arrays
+    are read-only, and the cache keeps at most max_cache_entries results,
+    evicting the least recently used.
+    """
+
+    def __init__(self, stations, start_date, temperature, precipitation, max_cache_entries=64):
+        self.stations = np.asarray(stations)
+        self.start_date = np.datetime64(start_date, "D")
+        self.temperature = np.asarray(temperature, dtype=np.float64)
+        self.precipitation = np.asarray(precipitation, dtype=np.float64)
+        if self.temperature.shape != self.precipitation.shape:
+            raise ValueError("temperature and precipitation must have the same shape")
+        if self.temperature.ndim != 2 or self.temperature.shape[0] != len(self.stations):
+            raise ValueError("variables must have shape (n_stations, n_days)")
+        if self.temperature.shape[1] == 0:
+            raise ValueError("variables must cover at least one day")
+        if max_cache_entries < 1:
+            raise ValueError("max_cache_entries must be at least 1")
+
+        self.dates = self.start_date + np.arange(self.temperature.shape[1])
+        self._station_index = {station: i for i, station in enumerate(self.stations.tolist())}
+        self._cache = OrderedDict()
+        self.max_cache_entries = max_cache_entries
+
+    @classmethod
+    def from_frame(cls, df, station_column="station", date_column="date",
+                   temperature_column="temperature", precipitation_column="precipitation",
+                   max_cache_entries=64):
+        """
+        Build a dataset from a long-format DataFrame with one row per station and day.
+
+        Returns:
+            WeatherDataset: Dataset covering every day between the first and last date
+
+        Raises:
+            ValueError: If the frame is empty, has missing stations or dates, or
+            has more than one row for the same station and day
+        """
+        if df.empty:
+            raise ValueError("Cannot build a WeatherDataset from an empty frame")
+        station_codes, stations = pd.factorize(df[station_column], sort=True)
+        dates = pd.to_datetime(df[date_column])
+        if (station_codes < 0).any() or dates.isna().any():
+            raise ValueError(f"{station_column} and {date_column} must not contain missing values")
+        days = dates.to_numpy().astype("datetime64[D]")
+        start_date = days.min()
+        day_index = (days - start_date).astype(np.int64)
+        shape = (len(stations), int(day_index.max()) + 1)
+
+        occupied = np.zeros(shape, dtype=bool)
+        occupied[station_codes, day_index] = True
+        if np.count_nonzero(occupied) != len(df):
+            raise ValueError(f"Duplicate rows for the same {station_column} and {date_column}")
+
+        grids = []
+        for column in (temperature_column, precipitation_column):
+            grid = np.full(shape, np.nan)
+            grid[station_codes, day_index] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            grids.append(grid)
+        return cls(np.asarray(stations), start_date, *grids, max_cache_entries=max_cache_entries)
+
+    def _cached(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            value = self._cache[key]
+        else:
+            value = _freeze(compute())
+            self._cache[key] = value
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+        return dict(value) if isinstance(value, dict) else value
+
+    def _variable(self, variable):
+        """Return the (n_stations, n_days) array for a variable name."""
+        if variable not in VARIABLES:
+            raise ValueError(f"Unknown variable: {variable}")
+        return getattr(self, variable)
+
+    def station_index(self, station):
+        """Return the row index of a station."""
+        try:
+            return self._station_index[station]
+        except KeyError:
+            raise KeyError(f"Unknown station: {station}") from None
+
+    def rolling_mean(self, window, variable="temperature", min_periods=None):
+        """
+        Trailing rolling mean over window days, ignoring missing values.
+
+        Returns:
+            np.ndarray: (n_stations, n_days) array, NaN where fewer than
+            min_periods (default: window) values are available
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        min_periods = window if min_periods is None else min_periods
+
+        # Only the cumulative sums are cached; each window is derived from them
+        sums, counts = self._cumulative_sums_counts(variable)
+        start = np.maximum(np.arange(1, sums.shape[1]) - window, 0)
+        window_sums = sums[:, 1:] - sums[:, start]
+        window_counts = counts[:, 1:] - counts[:, start]
+        means = _safe_divide(window_sums, window_counts)
+        means[window_counts < min_periods] = np.nan
+        return means
+
+    def _cumulative_sums_counts(self, variable):
+        """Return NaN-ignoring cumulative sums and counts, with a leading zero column."""
+        def compute():
+            sums, counts = _nan_sum_count(self._variable(variable), axis=1)
+            pad = ((0, 0), (1, 0))
+            return np.pad(sums, pad), np.pad(counts, pad)
+
+        return self._cached(("cumulative_sums_counts", variable), compute)
+
+    def _monthly_sums_counts(self, variable):
+        """Return the calendar months and per-month sums and counts of a variable."""
+        def compute():
+            values = self._variable(variable)
+            months = self.dates.astype("datetime64[M]")
+            starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+            valid = ~np.isnan(values)
+            sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1)
+            counts = np.add.reduceat(valid.astype(np.int64), starts, axis=1)
+            return months[starts], sums, counts
+
+        return self._cached(("monthly_sums_counts", variable), compute)
+
+    def monthly(self, variable="temperature", how="mean"):
+        """
+        Resample a variable to calendar months.
+
+        Args:
+            variable (str): "temperature" or "precipitation"
+            how (str): "mean" or "sum"
+
+        Returns:
+            tuple: (months, values) with months as datetime64[M] and values of
+            shape (n_stations, n_months)
+        """
+        months, sums, counts = self._monthly_sums_counts(variable)
+        if how == "sum":
+            return months, np.where(counts > 0, sums, np.nan)
+        if how == "mean":
+            return months, _safe_divide(sums, counts)
+        raise ValueError(f"Unsupported aggregation: {how}")
+
+    def climatology(self, variable="temperature"):
+        """
+        Long-term mean of a variable for each calendar month.
+
+        Returns:
+            np.ndarray: (n_stations, 12) array indexed by month (0 = January)
+        """
+        def compute():
+            months, sums, counts = self._monthly_sums_counts(variable)
+            month_of_year = months.astype(np.int64) % 12
+            one_hot = np.eye(12)[month_of_year]
+            return _safe_divide(sums @ one_hot, counts @ one_hot)
+
+        return self._cached(("climatology", variable), compute)
+
+    def anomalies(self, variable="temperature"):
+        """
+        Daily departures of a variable from its monthly climatology.
+
+        Returns:
+            np.ndarray: (n_stations, n_days) array of anomalies
+        """
+        def compute():
+            month_of_year = self.dates.astype("datetime64[M]").astype(np.int64) % 12
+            return self._variable(variable) - self.climatology(variable)[:, month_of_year]
+
+        return self._cached(("anomalies", variable), compute)
+
+    def rain_streaks(self, threshold=0.0):
+        """
+        Consecutive rainy-day run lengths, where a rainy day has precipitation above threshold.
+
+        Returns:
+            tuple: (longest, current) arrays of shape (n_stations,) with the
+            longest streak on record and the streak still running on the last day
+        """
+        def compute():
+            rainy = self.precipitation > threshold
+            day_number = np.arange(1, rainy.shape[1] + 1)
+            last_dry_day = np.maximum.accumulate(np.where(rainy, 0, day_number), axis=1)
+            run_lengths = day_number - last_dry_day
+            return run_lengths.max(axis=1, initial=0), run_lengths[:, -1]
+
+        return self._cached(("rain_streaks", threshold), compute)
+
+    def summary(self, rain_threshold=0.0):
+        """
+        Whole-period aggregates for every station.
+
+        Returns:
+            dict: Arrays of shape (n_stations,) keyed by aggregate name
+        """
+        def compute():
+            temperature, precipitation = self.temperature, self.precipitation
+            valid = ~np.isnan(temperature)
+            has_temperature = valid.any(axis=1)
+            longest, current = self.rain_streaks(rain_threshold)
+            return {
+                "mean_temperature": _safe_divide(np.where(valid, temperature, 0.0).sum(axis=1),
+                                                 valid.sum(axis=1)),
+                "max_temperature": np.where(has_temperature, np.where(
+                    valid, temperature, -np.inf).max(axis=1), np.nan),
+                "min_temperature": np.where(has_temperature, np.where(
+                    valid, temperature, np.inf).min(axis=1), np.nan),
+                "total_precipitation": np.where(np.isnan(precipitation), 0.0, precipitation).sum(axis=1),
+                "rainy_days": (precipitation > rain_threshold).sum(axis=1),
+                "longest_rain_streak": longest,
+                "current_rain_streak": current,
+            }
+
+        return self._cached(("summary", rain_threshold), compute)
+
+    def station_summary(self, station, rain_threshold=0.0):
+        """
+        Whole-period aggregates for a single station.
+
+        Reads the station's row from the cached summary() arrays, so stations do
+        not take up cache entries of their own.
+
+        Returns:
+            dict: Scalar aggregates keyed by name
+        """
+        i = self.station_index(station)
+        return {name: values[i].item() for name, values in self.summary(rain_threshold).items()}
+
+
+def load_weather_data(path, **columns):
+    """
+    Load daily station data from a Parquet or CSV file.
+
+    Only the station, date, temperature and precipitation columns are read.
+    Their names can be overridden with the keyword arguments accepted by
+    WeatherDataset.from_frame.
+
+    Returns:
+        WeatherDataset: The loaded dataset
+    """
+    names = {
+        "station_column": "station",
+        "date_column": "date",
+        "temperature_column": "temperature",
+        "precipitation_column": "precipitation",
+    }
+    names.update(columns)
+    usecols = list(names.values())
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".parquet", ".pq"):
+        df = pd.read_parquet(path, columns=usecols)
+    elif extension in (".csv", ".gz"):
+        df = pd.read_csv(path, usecols=usecols, parse_dates=[names["date_column"]])
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+    return WeatherDataset.from_frame(df, **names)
@@ -0,0 +1,139 @@
+"""
+Tests for weather_analytics, comparing the vectorized results with pandas
+and plain Python loops on a small dataset with missing values.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather_analytics import WeatherDataset, load_weather_data
+
+
+def make_frame(seed=0):
+    """
+    Build three years of shuffled daily data for two stations, with gaps.
+
+    Returns:
+        pd.DataFrame: Long-format frame with one row per station and day
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-01", "2002-12-31")
+    frames = []
+    for station in ["B", "A"]:
+        rainy = rng.random(len(dates)) < 0.3
+        frames.append(pd.DataFrame({
+            "station": station,
+            "date": dates,
+            "temperature": rng.normal(15, 5, len(dates)),
+            "precipitation": np.where(rainy, rng.gamma(2, 3, len(dates)), 0.0),
+        }))
+    df = pd.concat(frames).sample(frac=1, random_state=seed).reset_index(drop=True)
+    df.loc[df.index[:60], "temperature"] = np.nan
+    return df
+
+
+def station_series(df, station):
+    """Return one station's rows indexed by date."""
+    return df[df["station"] == station].set_index("date").sort_index()
+
+
+def longest_and_current_streak(precipitation, threshold=0.0):
+    """Compute rain streaks with a plain loop, as a reference."""
+    longest = current = 0
+    for value in precipitation:
+        current = current + 1 if value > threshold else 0
+        longest = max(longest, current)
+    return longest, current
+
+
+def test_matches_pandas():
+    df = make_frame()
+    dataset = WeatherDataset.from_frame(df)
+    longest, current = dataset.rain_streaks()
+
+    for i, station in enumerate(dataset.stations):
+        series = station_series(df, station)
+        expected = series["temperature"].rolling(7, min_periods=3).mean().to_numpy()
+        assert np.allclose(dataset.rolling_mean(7, min_periods=3)[i], expected, equal_nan=True)
+
+        expected = series["temperature"].resample("MS").mean().to_numpy()
+        assert np.allclose(dataset.monthly("temperature", "mean")[1][i], expected, equal_nan=True)
+        expected = series["precipitation"].resample("MS").sum().to_numpy()
+        assert np.allclose(dataset.monthly("precipitation", "sum")[1][i], expected)
+
+        climatology = series["temperature"].groupby(series.index.month).mean()
+        assert np.allclose(dataset.climatology()[i], climatology.to_numpy())
+        expected = (series["temperature"] - series.index.month.map(climatology)).to_numpy()
+        assert np.allclose(dataset.anomalies()[i], expected, equal_nan=True)
+
+        assert (longest[i], current[i]) == longest_and_current_streak(series["precipitation"])
+
+        summary = dataset.station_summary(station)
+        assert np.isclose(summary["mean_temperature"], series["temperature"].mean())
+        assert np.isclose(summary["max_temperature"], series["temperature"].max())
+        assert summary["rainy_days"] == (series["precipitation"] > 0).sum()
+
+
+def test_load_parquet_and_csv():
+    df = make_frame()
+    directory = tempfile.mkdtemp()
+    df.to_parquet(os.path.join(directory, "weather.parquet"))
+    df.to_csv(os.path.join(directory, "weather.csv"), index=False)
+
+    from_parquet = load_weather_data(os.path.join(directory, "weather.parquet"))
+    from_csv = load_weather_data(os.path.join(directory, "weather.csv"))
+    assert list(from_parquet.stations) == ["A", "B"]
+    assert np.allclose(from_parquet.temperature, from_csv.temperature, equal_nan=True)
+    assert np.allclose(from_parquet.precipitation, from_csv.precipitation)
+
+
+def test_cached_arrays_are_read_only():
+    dataset = WeatherDataset.from_frame(make_frame())
+    anomalies = dataset.anomalies()
+    with pytest.raises(ValueError):
+        anomalies[0, 0] = 0.0
+
+    dataset.station_summary("A")["mean_temperature"] = 0.0
+    assert dataset.station_summary("A")["mean_temperature"] != 0.0
+
+
+def test_cache_is_bounded():
+    dataset = WeatherDataset.from_frame(make_frame(), max_cache_entries=3)
+    for threshold in range(10):
+        dataset.rain_streaks(threshold)
+    assert len(dataset._cache) == 3
+
+
+def test_station_summaries_do_not_evict_dataset_aggregates():
+    dataset = WeatherDataset.from_frame(make_frame(), max_cache_entries=4)
+    anomalies = dataset.anomalies()
+    for _ in range(10):
+        for station in dataset.stations:
+            dataset.station_summary(station)
+    assert dataset.anomalies() is anomalies
+
+
+def test_single_entry_cache():
+    dataset = WeatherDataset(["a"], "2025-01-01", np.ones((1, 5)), np.zeros((1, 5)),
+                             max_cache_entries=1)
+    assert dataset.summary()["rainy_days"][0] == 0
+    assert dataset.station_summary("a")["mean_temperature"] == 1.0
+
+
+def test_constructor_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        WeatherDataset(["a"], "2025-01-01", np.ones((1, 5)), np.zeros((1, 5)), max_cache_entries=0)
+    with pytest.raises(ValueError):
+        WeatherDataset(["a"], "2025-01-01", np.ones((1, 0)), np.zeros((1, 0)))
+
+
+def test_from_frame_rejects_bad_input():
+    df = make_frame()
+    for bad in (df.iloc[:0], pd.concat([df, df.iloc[:1]])):
+        with pytest.raises(ValueError):
+            WeatherDataset.from_frame(bad)
+